@@ -0,0 +1,145 @@
+"""
+Lookup tables and integer kernels for move generation. The tables are built once at import.
+
+Squares are numbered ``rank * 8 + file``, which is also the bit used for a square in a bitboard.
+"""
+
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from pieces import Vector
+
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+QUEEN_DIRECTIONS = BISHOP_DIRECTIONS + ROOK_DIRECTIONS
+KNIGHT_DIRECTIONS = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+
+
+def _walk(square: int, rank_step: int, file_step: int) -> tuple[int, ...]:
+    """Squares reached by repeatedly stepping from ``square`` until falling off the board"""
+    rank, file = divmod(square, 8)
+    squares = []
+    while 0 <= (rank := rank + rank_step) < 8 and 0 <= (file := file + file_step) < 8:
+        squares.append(rank * 8 + file)
+    return tuple(squares)
+
+
+# RAYS[rank_step, file_step][square] are the squares along that vector from square, ordered outwards
+RAYS: dict[tuple[int, int], tuple[tuple[int, ...], ...]] = {
+    direction: tuple(_walk(square, *direction) for square in range(64))
+    for direction in QUEEN_DIRECTIONS + KNIGHT_DIRECTIONS
+}
+
+# RAY_MASKS[rank_step, file_step][square] is the bitboard of the matching RAYS entry, for the sliding directions
+RAY_MASKS: dict[tuple[int, int], tuple[int, ...]] = {
+    direction: tuple(sum(1 << target for target in ray) for ray in RAYS[direction]) for direction in QUEEN_DIRECTIONS
+}
+
+
+def _between(a: int, b: int) -> tuple[int, ...]:
+    for direction in QUEEN_DIRECTIONS:
+        if b in (ray := RAYS[direction][a]):
+            return ray[: ray.index(b)]
+    return ()
+
+
+# BETWEEN[a][b] are the squares strictly between a and b ordered from a, empty unless they share a line
+BETWEEN = tuple(tuple(_between(a, b) for b in range(64)) for a in range(64))
+
+
+def _step_masks(directions: tuple[tuple[int, int], ...]) -> tuple[int, ...]:
+    """Bitboard for each square of the squares a single step away along ``directions``"""
+    return tuple(
+        sum(1 << RAYS[direction][square][0] for direction in directions if RAYS[direction][square])
+        for square in range(64)
+    )
+
+
+KNIGHT_ATTACKS = _step_masks(KNIGHT_DIRECTIONS)
+KING_ATTACKS = _step_masks(QUEEN_DIRECTIONS)
+# PAWN_ATTACKS[rank_step][square] for pawns advancing by ``rank_step``
+PAWN_ATTACKS = {rank_step: _step_masks(((rank_step, 1), (rank_step, -1))) for rank_step in (-1, 1)}
+
+
+def ray_targets(occupied: int, own: int, square: int, vectors: Iterable["Vector"]) -> int:
+    """
+    Bitboard of squares reachable from ``square`` along each vector, given the ``occupied`` and moving side's ``own``
+    bitboards.
+
+    A ray stops at the first occupied square, which is only included when it holds an opponent piece.
+    """
+    targets = 0
+    for vector in vectors:
+        for target in RAYS[vector.rank, vector.file][square][: vector.magnitude]:
+            bit = 1 << target
+            if occupied & bit:
+                targets |= bit & ~own
+                break
+            targets |= bit
+    return targets
+
+
+def iter_squares(bitboard: int) -> Iterator[int]:
+    """Squares of the bits set in ``bitboard``, lowest first"""
+    while bitboard:
+        lowest_bit = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
+
+
+def _slider_attacks(occupied: int, square: int, directions: tuple[tuple[int, int], ...]) -> int:
+    """
+    Bitboard of squares attacked along the sliding ``directions``, including the first blocker of each ray.
+
+    Rays heading towards higher squares meet their first blocker at its lowest set bit, rays heading towards lower
+    squares at its highest set bit. Everything past the blocker is masked off with the blocker's own ray.
+    """
+    attacks = 0
+    for direction in directions:
+        ray = RAY_MASKS[direction][square]
+        if blockers := ray & occupied:
+            if direction[0] * 8 + direction[1] > 0:
+                first_blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                first_blocker = blockers.bit_length() - 1
+            ray ^= RAY_MASKS[direction][first_blocker]
+        attacks |= ray
+    return attacks
+
+
+def _relevant_mask(square: int, directions: tuple[tuple[int, int], ...]) -> int:
+    """Squares whose occupancy can change the attacks from ``square``, i.e. every ray without its edge square"""
+    mask = 0
+    for direction in directions:
+        mask |= sum(1 << target for target in RAYS[direction][square][:-1])
+    return mask
+
+
+def _attack_table(mask: int, square: int, directions: tuple[tuple[int, int], ...]) -> dict[int, int]:
+    """Attacks from ``square`` for every subset of ``mask``, keyed by that subset"""
+    table = {}
+    subset = 0
+    while True:
+        table[subset] = _slider_attacks(subset, square, directions)
+        if not (subset := (subset - mask) & mask):
+            return table
+
+
+ROOK_MASKS = tuple(_relevant_mask(square, ROOK_DIRECTIONS) for square in range(64))
+BISHOP_MASKS = tuple(_relevant_mask(square, BISHOP_DIRECTIONS) for square in range(64))
+
+# ROOK_TABLES[square][occupied & ROOK_MASKS[square]] is the rook attack bitboard from square, likewise for bishops
+ROOK_TABLES = tuple(_attack_table(ROOK_MASKS[square], square, ROOK_DIRECTIONS) for square in range(64))
+BISHOP_TABLES = tuple(_attack_table(BISHOP_MASKS[square], square, BISHOP_DIRECTIONS) for square in range(64))
+
+
+def rook_attacks(occupied: int, square: int) -> int:
+    return ROOK_TABLES[square][occupied & ROOK_MASKS[square]]
+
+
+def bishop_attacks(occupied: int, square: int) -> int:
+    return BISHOP_TABLES[square][occupied & BISHOP_MASKS[square]]
+
+
+def queen_attacks(occupied: int, square: int) -> int:
+    return ROOK_TABLES[square][occupied & ROOK_MASKS[square]] | BISHOP_TABLES[square][occupied & BISHOP_MASKS[square]]
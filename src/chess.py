@@ -1,24 +1,101 @@
+import logging
+import random
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Literal, Optional
-
-from pieces import ChessPiece, Position, Vector, Bishop, Rook, Knight, Queen, King, Side, Pawn, MoveType, MoveEffect
+from typing import Iterator, Literal, Optional
+
+from bitboards import (
+    BETWEEN,
+    KING_ATTACKS,
+    KNIGHT_ATTACKS,
+    KNIGHT_DIRECTIONS,
+    PAWN_ATTACKS,
+    QUEEN_DIRECTIONS,
+    RAYS,
+    bishop_attacks,
+    iter_squares,
+    queen_attacks,
+    ray_targets,
+    rook_attacks,
+)
+from pieces import (
+    ChessPiece,
+    Position,
+    Bishop,
+    Rook,
+    Knight,
+    Queen,
+    King,
+    Side,
+    OPPONENT,
+    Pawn,
+    MoveType,
+    MoveEffect,
+    MOVE_TYPE_SEPARATORS,
+    PAWN_MOVE_SETS,
+)
+
+logger = logging.getLogger(__name__)
+
+SLIDER_ATTACKS = {Rook: rook_attacks, Bishop: bishop_attacks, Queen: queen_attacks}
+
+# ATTACKER_SQUARES[square] are the squares a piece attacking the square could stand on, scanning outwards along each
+# queen and then each knight direction
+ATTACKER_SQUARES = tuple(
+    sum((RAYS[direction][square] for direction in QUEEN_DIRECTIONS), ())
+    + tuple(RAYS[direction][square][0] for direction in KNIGHT_DIRECTIONS if RAYS[direction][square])
+    for square in range(64)
+)
+
+# Direction a side's pawns advance in, white pawns head towards rank 0
+PAWN_RANK_STEP = {Side.WHITE: -1, Side.BLACK: 1}
+
+# STEP_TARGETS[piece_class][square] is the bitboard a knight or king reaches from the square
+STEP_TARGETS = {Knight: KNIGHT_ATTACKS, King: KING_ATTACKS}
+
+# ZOBRIST_KEYS[piece_class, side][square] is XORed into ChessBoard.zobrist while such a piece sits on the square
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_KEYS = {
+    (piece_class, side): tuple(_zobrist_random.getrandbits(64) for _ in range(64))
+    for piece_class in (Pawn, Rook, Bishop, Knight, Queen, King)
+    for side in (Side.WHITE, Side.BLACK)
+}
+
+# Pawn pushes keyed by (zobrist, square). Shared by every board since the hash identifies the position.
+_MOVES_CACHE: dict[tuple[int, int], int] = {}
+MOVES_CACHE_SIZE = 10_000
+
+# Checkmate verdicts keyed by (zobrist, player_in_check), the checking pieces follow from the position
+_CHECKMATE_CACHE: dict[tuple[int, Side], bool] = {}
+CHECKMATE_CACHE_SIZE = 4096
+
+# Material values for the search's evaluation and capture ordering
+PIECE_VALUES = {Pawn: 100, Knight: 300, Bishop: 300, Rook: 500, Queen: 900, King: 0}
+# Score for being checkmated, beyond any material balance. Deeper remaining depth is added so quicker mates score higher.
+MATE_SCORE = 100_000
 
 
 class InvalidMove(Exception):
     """Raise when an invalid move is requested"""
 
 
-@dataclass
+@dataclass(slots=True)
 class Move:
     piece: ChessPiece
     src: Position
     dst: Position
     type: Optional[MoveType] = None
     side_effects: set[MoveEffect] = field(default_factory=set)
+    # The move is complete once ChessBoard.move returns it, so its notation only needs working out once
+    _notation: Optional[str] = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def long_algebraic_notation(self) -> str:
+        if self._notation is None:
+            self._notation = self._format_long_algebraic_notation()
+        return self._notation
+
+    def _format_long_algebraic_notation(self) -> str:
         if self.type == MoveType.CASTLE:
             return "O-O" if self.dst.file == 6 else "O-O-O"
 
@@ -31,33 +108,77 @@ class Move:
             elif MoveEffect.CHECK in self.side_effects:
                 suffix += MoveEffect.CHECK.value
 
-        return f"{self.piece.algebraic_notation_name}{self.src.algebraic_notation_name}{self.type.value}{self.dst.algebraic_notation_name}{suffix}"
+        return (
+            self.piece.algebraic_notation_name
+            + self.src.algebraic_notation_name
+            + MOVE_TYPE_SEPARATORS[self.type]
+            + self.dst.algebraic_notation_name
+            + suffix
+        )
 
 
 class ChessBoard:
     def __init__(self, pieces: Optional[list[ChessPiece]] = None):
-        self.pieces = pieces if pieces else self.default_pieces()
-        self.board: dict[Position, Optional[ChessPiece]] = {piece.position: piece for piece in self.pieces}
-
-    def get_piece(self, position: Position) -> ChessPiece:
-        return self.board.get(position)
-
-    def get_possible_moves(self, piece: ChessPiece, move_type: Literal["move", "attack"]) -> list[Position]:
-        """"""
-        moves = []
-        move_set = piece.move_set if move_type == "move" else piece.attack_set
-        for vector in move_set:
-            for step in range(vector.magnitude):
-                move = piece.position + Position((1 + step) * vector.rank, (1 + step) * vector.file)
-                if not (0 <= move.rank < 8 and 0 <= move.file < 8):
-                    # we have reached the end of the board so stop following the vector
-                    break
-                else:
-                    moves.append(move)
-                    if self.get_piece(move) or not (0 <= move.rank < 8 and 0 <= move.file < 8):
-                        # A piece is blocking us so don't follow the vector anymore
-                        break
-        return moves
+        # The pieces the board was set up with, ``board`` tracks where they are and which remain
+        self.pieces = tuple(pieces if pieces else self.default_pieces())
+        # Bit ``rank * 8 + file`` of a bitboard is set when a piece occupies that square. ``board`` is the side-table
+        # used to retrieve the piece object sitting on a square.
+        self.board: list[Optional[ChessPiece]] = [None] * 64
+        self.occupied = 0
+        self.side_bb = {Side.WHITE: 0, Side.BLACK: 0}
+        self.piece_bb = {piece_class: 0 for piece_class in (Pawn, Rook, Bishop, Knight, Queen, King)}
+        # Zobrist hash of the pieces on the board, kept up to date as pieces are placed and removed
+        self.zobrist = 0
+        for piece in self.pieces:
+            self._place_piece(piece, piece.square)
+        # Kings are never captured or promoted to, so they can be looked up once
+        self._kings = {piece.side: piece for piece in self.pieces if piece.__class__ == King}
+
+    def get_piece(self, position: Position) -> Optional[ChessPiece]:
+        return self.board[position.square]
+
+    def _place_piece(self, piece: ChessPiece, square: int) -> None:
+        bit = 1 << square
+        self.board[square] = piece
+        self.occupied |= bit
+        self.side_bb[piece.side] |= bit
+        self.piece_bb[piece.__class__] |= bit
+        self.zobrist ^= ZOBRIST_KEYS[piece.__class__, piece.side][square]
+
+    def _remove_piece(self, square: int) -> Optional[ChessPiece]:
+        if piece := self.board[square]:
+            mask = ~(1 << square)
+            self.board[square] = None
+            self.occupied &= mask
+            self.side_bb[piece.side] &= mask
+            self.piece_bb[piece.__class__] &= mask
+            self.zobrist ^= ZOBRIST_KEYS[piece.__class__, piece.side][square]
+        return piece
+
+    def get_possible_moves(self, piece: ChessPiece, move_type: Literal["move", "attack"]) -> Iterator[int]:
+        """Squares the piece could move to, generated lazily from a bitboard taken when called"""
+        return iter_squares(self.get_moves_bb(piece, move_type))
+
+    def get_moves_bb(self, piece: ChessPiece, move_type: Literal["move", "attack"]) -> int:
+        """Bitboard of the squares the piece could move to, ignoring whether it would leave its King in check"""
+        if slider_attacks := SLIDER_ATTACKS.get(piece.__class__):
+            # Sliding pieces move and attack the same way
+            return slider_attacks(self.occupied, piece.square) & ~self.side_bb[piece.side]
+        if step_targets := STEP_TARGETS.get(piece.__class__):
+            return step_targets[piece.square] & ~self.side_bb[piece.side]
+
+        # Only pawns are left, their attacks are a table read like the step pieces
+        if move_type == "attack":
+            return PAWN_ATTACKS[PAWN_RANK_STEP[piece.side]][piece.square] & ~self.side_bb[piece.side]
+        # Pushes can be blocked so are walked along the move set, and cached by position
+        key = (self.zobrist, piece.square)
+        if (targets := _MOVES_CACHE.get(key)) is None:
+            move_set = PAWN_MOVE_SETS[piece.side][piece.square >> 3]
+            targets = ray_targets(self.occupied, self.side_bb[piece.side], piece.square, move_set)
+            if len(_MOVES_CACHE) >= MOVES_CACHE_SIZE:
+                _MOVES_CACHE.clear()
+            _MOVES_CACHE[key] = targets
+        return targets
 
     def validate_move(self, move: Move, player: Side) -> MoveType:
         if not move.piece:
@@ -66,16 +187,16 @@ class ChessBoard:
         if move.piece.side != player:
             raise InvalidMove("Cannot move another player's piece")
 
-        if dst_piece := self.board.get(move.dst):
-            # there is another piece at the destination
-            if dst_piece.side == move.piece.side:
-                raise InvalidMove("Cannot move two pieces of the same side to same square")
+        dst_bit = 1 << move.dst.square
+        if self.side_bb[player] & dst_bit:
+            raise InvalidMove("Cannot move two pieces of the same side to same square")
+
+        if self.occupied & dst_bit:
+            # piece is taking an opponent piece
+            if self.get_moves_bb(move.piece, "attack") & dst_bit:
+                return MoveType.ATTACK
             else:
-                # piece is taking an opponent piece
-                if move.dst in self.get_possible_moves(move.piece, "attack"):
-                    return MoveType.ATTACK
-                else:
-                    raise InvalidMove("Attack is not in src piece's attack set")
+                raise InvalidMove("Attack is not in src piece's attack set")
         else:
             # Attempting to move to an empty square
             # Check if a special move for the piece we are moving
@@ -83,22 +204,19 @@ class ChessBoard:
                 if move.dst in positions:
                     if (
                         move.piece.__class__ == King
-                        and move.piece.position.rank == move.dst.rank
-                        and (
-                            move.dst.file == move.piece.position.file + 2
-                            or move.dst.file == move.piece.position.file - 2
-                        )
+                        and move.src.rank == move.dst.rank
+                        and (move.dst.file == move.src.file + 2 or move.dst.file == move.src.file - 2)
                     ):
-                        return self._validate_castle(move.piece, move.piece.position, move.dst)
+                        return self._validate_castle(move.piece, move.dst.square)
                     return move_type
 
             # it's a normal move
-            if move.dst in self.get_possible_moves(move.piece, "move"):
+            if self.get_moves_bb(move.piece, "move") & dst_bit:
                 return MoveType.MOVE
             else:
                 raise InvalidMove("Move is not in src piece's move set")
 
-    def _validate_castle(self, piece: ChessPiece, src: Position, dst: Position):
+    def _validate_castle(self, piece: ChessPiece, dst: int):
         """
         Requirements for castling:
         - King has not been previously moved
@@ -110,30 +228,25 @@ class ChessBoard:
         if piece.has_been_moved:
             raise InvalidMove("Cannot castle a King that has been previously moved.")
 
-        # Depending on whether we are castling kingside or queenside we have different positions to check
-        positions_to_be_clear, position_to_have_rook = (
-            ([Position(piece.position.rank, 5), Position(piece.position.rank, 6)], Position(piece.position.rank, 7))
-            if dst.file == src.file + 2
-            else (
-                [Position(piece.position.rank, 1), Position(piece.position.rank, 2), Position(piece.position.rank, 3)],
-                Position(piece.position.rank, 0),
-            )
-        )
+        # Depending on whether we are castling kingside or queenside we have different squares to check
+        path = King.CASTLE_PATHS[piece.square >> 3, dst > piece.square]
 
         if not (
-            (maybe_rook := self.get_piece(position_to_have_rook))
+            (maybe_rook := self.board[path.rook_src])
             and maybe_rook.__class__ == Rook
             and not maybe_rook.has_been_moved
         ):
             raise InvalidMove("Cannot castle when rook has been moved from default position.")
 
-        for position in positions_to_be_clear:
-            if self.get_piece(position) is not None:
-                raise InvalidMove("Cannot castle when pieces are in between King and Rook.")
-            if self.get_pieces_attacking_position(position, ~piece.side):
+        if self.occupied & path.between_mask:
+            raise InvalidMove("Cannot castle when pieces are in between King and Rook.")
+
+        opponent = OPPONENT[piece.side]
+        for square in path.between:
+            if self.is_square_attacked(square, opponent):
                 raise InvalidMove("Cannot castle through positions that are currently attacked.")
 
-        if self.get_pieces_attacking_position(piece.position, ~piece.side):
+        if self.is_square_attacked(piece.square, opponent):
             raise InvalidMove("Cannot castle when King is in check.")
 
         return MoveType.CASTLE
@@ -143,23 +256,24 @@ class ChessBoard:
         with ProvisionalMove(src, dst, player, self) as pm:
             # Raise an invalid move if new position results in ourselves being in check, provisional move will then
             # handle rolling back
-            if self._get_pieces_checking_king(player):
+            if self._is_king_in_check(player):
                 raise InvalidMove("King would be in check.")
 
             if pm.move.type == MoveType.CASTLE:
-                self._move_castling_rook(src, dst)
+                self._move_castling_rook(dst)
 
             # Is a pawn promotion
             if isinstance(pm.move.piece, Pawn) and pm.move.dst.rank == pm.move.piece.promotion_rank:
                 # prompt user for promotion piece
-                self.board[dst] = Queen(dst, player)
+                self._remove_piece(dst.square)
+                self._place_piece(Queen(dst, player), dst.square)
                 pm.move.side_effects.add(MoveEffect.PROMOTION)
 
             # Does this move check the opponent?
-            if checking_pieces := self._get_pieces_checking_king(~player):
+            if checking_pieces := self._get_pieces_checking_king(OPPONENT[player]):
                 pm.move.side_effects.add(MoveEffect.CHECK)
-                if self._is_checkmate(checking_pieces, ~player):
-                    print(f"checkmate: {self._is_checkmate(checking_pieces, ~player)}")
+                if checkmate := self._is_checkmate(checking_pieces, OPPONENT[player]):
+                    logger.debug("checkmate: %s", checkmate)
                     pm.move.side_effects.add(MoveEffect.CHECKMATE)
 
             pm.commit()
@@ -167,6 +281,15 @@ class ChessBoard:
         return pm.move
 
     def _is_checkmate(self, checking_pieces: list[ChessPiece], player_in_check: Side) -> bool:
+        key = (self.zobrist, player_in_check)
+        if (checkmate := _CHECKMATE_CACHE.get(key)) is None:
+            checkmate = self._search_checkmate(checking_pieces, player_in_check)
+            if len(_CHECKMATE_CACHE) >= CHECKMATE_CACHE_SIZE:
+                _CHECKMATE_CACHE.clear()
+            _CHECKMATE_CACHE[key] = checkmate
+        return checkmate
+
+    def _search_checkmate(self, checking_pieces: list[ChessPiece], player_in_check: Side) -> bool:
         """
         Determine if opponent has any possible moves to get themselves out of check, if not then it is checkmate.
 
@@ -179,14 +302,14 @@ class ChessBoard:
         :return:
         """
         king = self._get_king(player_in_check)
-        for dst in [dst for dst in self.get_possible_moves(king, "move")]:
+        for dst in self.get_possible_moves(king, "move"):
+            undo = self._make(king.square, dst)
             try:
-                with ProvisionalMove(king.position, dst, player_in_check, self):
-                    if not self._get_pieces_checking_king(player_in_check):
-                        print("Player can move or attack with King out of check.")
-                        return False
-            except InvalidMove:
-                continue
+                if not self._is_king_in_check(player_in_check):
+                    logger.debug("Player can move or attack with King out of check.")
+                    return False
+            finally:
+                self._unmake(undo)
 
         # Determine if checking piece can be taken. Only a possible way out of check if there is one attacking piece
         if len(checking_pieces) == 1 and (
@@ -194,124 +317,222 @@ class ChessBoard:
         ):
             # Check that this attack doesn't expose another check
             for counter_piece in counter_pieces:
-                with ProvisionalMove(counter_piece.position, checking_pieces[0].position, player_in_check, self):
-                    if not self._get_pieces_checking_king(player_in_check):
+                undo = self._make(counter_piece.square, checking_pieces[0].square)
+                try:
+                    if not self._is_king_in_check(player_in_check):
                         return False
+                finally:
+                    self._unmake(undo)
 
             # Check if any of the player in check's pieces can move to an in between position and get king out of check.
             # Only a possible way out of check if there is only one attacking piece.
             if len(checking_pieces) == 1:
-                rank_difference = checking_pieces[0].position.rank - king.position.rank
-                file_difference = checking_pieces[0].position.file - king.position.file
-                lower_abs_diff, higher_abs_diff = min(abs(rank_difference), abs(file_difference)), max(
-                    abs(rank_difference), abs(file_difference)
-                )
-                if lower_abs_diff == 0:
-                    vector = Vector(
-                        rank=int(rank_difference / higher_abs_diff),
-                        file=int(file_difference / higher_abs_diff),
-                        magnitude=higher_abs_diff,
-                    )
-                else:
-                    vector = Vector(
-                        rank=int(rank_difference / lower_abs_diff),
-                        file=int(file_difference / lower_abs_diff),
-                        magnitude=lower_abs_diff,
-                    )
-
-                inbetween_positions = [
-                    king.position + Position(rank=vector.rank * step, file=vector.file * step)
-                    for step in range(1, vector.magnitude)
-                ]
-
-                for dst in inbetween_positions:
+                for square in BETWEEN[king.square][checking_pieces[0].square]:
+                    dst = Position.from_square(square)
                     for blocking_pieces in self.get_pieces_attacking_position(dst, player_in_check, "move"):
-                        with ProvisionalMove(blocking_pieces.position, dst, player_in_check, self):
-                            if not self._get_pieces_checking_king(player_in_check):
+                        undo = self._make(blocking_pieces.square, square)
+                        try:
+                            if not self._is_king_in_check(player_in_check):
                                 return False
+                        finally:
+                            self._unmake(undo)
 
         # There are no solutions to getting out of check; checkmate.
         return True
 
-    def _move_castling_rook(self, src: Position, dst: Position):
-        rook_src, rook_dst = (
-            (Position(src.rank, 7), Position(src.rank, 5))
-            if dst.file == 6
-            else (Position(src.rank, 0), Position(src.rank, 3))
-        )
-        self.board[rook_dst] = self.get_piece(rook_src)
-        self.board[rook_src] = None
+    def _make(self, src: int, dst: int) -> tuple[ChessPiece, Optional[ChessPiece], int, int]:
+        """
+        Move a piece without validating it or marking it as moved, for trying out moves already known to be possible
+        when all that matters is the resulting position. Returns the token to pass to _unmake.
+        """
+        captured = self._remove_piece(dst)
+        piece = self._remove_piece(src)
+        self._place_piece(piece, dst)
+        piece.square = dst
+        return piece, captured, src, dst
+
+    def _unmake(self, undo: tuple[ChessPiece, Optional[ChessPiece], int, int]) -> None:
+        piece, captured, src, dst = undo
+        self._remove_piece(dst)
+        self._place_piece(piece, src)
+        if captured:
+            self._place_piece(captured, dst)
+        piece.square = src
+
+    def _move_castling_rook(self, dst: Position):
+        path = King.CASTLE_PATHS[dst.rank, dst.file == 6]
+        rook = self._remove_piece(path.rook_src)
+        rook.square = path.rook_dst
+        self._place_piece(rook, path.rook_dst)
 
     def _get_pieces_checking_king(self, player: Side) -> list[ChessPiece]:
-        return self.get_pieces_attacking_position(self._get_king(player).position, ~player)
+        return self.get_pieces_attacking_position(self._get_king(player).position, OPPONENT[player])
+
+    def _is_king_in_check(self, player: Side) -> bool:
+        return self.is_square_attacked(self._get_king(player).square, OPPONENT[player])
 
     def _get_king(self, player: Side) -> ChessPiece:
-        for piece in self.pieces:
-            if piece.__class__ == King and piece.side == player:
-                return piece
+        return self._kings[player]
 
     def get_pieces_attacking_position(
         self, position: Position, player: Side, move_type: Literal["attack", "move"] = "attack"
     ) -> list[ChessPiece]:
-        # Queen and knight attacks cover all attack vectors
-        all_possible_attack_vectors = [
-            # queen
-            Vector(rank=1, file=1, magnitude=8),
-            Vector(rank=1, file=-1, magnitude=8),
-            Vector(rank=-1, file=1, magnitude=8),
-            Vector(rank=-1, file=-1, magnitude=8),
-            Vector(rank=1, file=0, magnitude=8),
-            Vector(rank=-1, file=0, magnitude=8),
-            Vector(rank=0, file=1, magnitude=8),
-            Vector(rank=0, file=-1, magnitude=8),
-            # knight
-            Vector(rank=2, file=1, magnitude=1),
-            Vector(rank=2, file=-1, magnitude=1),
-            Vector(rank=-2, file=1, magnitude=1),
-            Vector(rank=-2, file=-1, magnitude=1),
-            Vector(rank=1, file=2, magnitude=1),
-            Vector(rank=1, file=-2, magnitude=1),
-            Vector(rank=-1, file=2, magnitude=1),
-            Vector(rank=-1, file=-2, magnitude=1),
-        ]
-        pieces_attacking_position = []
-        for vector in all_possible_attack_vectors:
-            for step in range(vector.magnitude):
-                move = position + Position((1 + step) * vector.rank, (1 + step) * vector.file)
-                if not (0 <= move.rank < 8 and 0 <= move.file < 8):
-                    # we have reached the end of the board so stop following the vector
+        square = position.square
+        if not (attackers := self.get_attackers_bb(square, player, move_type)):
+            return []
+        # Report attackers in the order they are met scanning outwards from the square
+        return [self.board[target] for target in ATTACKER_SQUARES[square] if attackers >> target & 1]
+
+    def is_square_attacked(self, square: int, player: Side) -> bool:
+        """Whether any of the player's pieces attacks the square, stopping at the first kind of piece found"""
+        own = self.side_bb[player]
+        if own >> square & 1:
+            return False
+
+        piece_bb = self.piece_bb
+        queens = piece_bb[Queen]
+        return bool(
+            KNIGHT_ATTACKS[square] & piece_bb[Knight] & own
+            or PAWN_ATTACKS[-PAWN_RANK_STEP[player]][square] & piece_bb[Pawn] & own
+            or KING_ATTACKS[square] & piece_bb[King] & own
+            or rook_attacks(self.occupied, square) & (piece_bb[Rook] | queens) & own
+            or bishop_attacks(self.occupied, square) & (piece_bb[Bishop] | queens) & own
+        )
+
+    def get_attackers_bb(self, square: int, player: Side, move_type: Literal["attack", "move"] = "attack") -> int:
+        """Bitboard of the player's pieces able to move to the square, ignoring whether their King is left in check"""
+        own = self.side_bb[player]
+        if own >> square & 1:
+            return 0
+
+        # Bar pawns, pieces move the same way in both directions, so look from the square towards each kind of piece
+        piece_bb = self.piece_bb
+        queens = piece_bb[Queen]
+        attackers = (
+            rook_attacks(self.occupied, square) & (piece_bb[Rook] | queens)
+            | bishop_attacks(self.occupied, square) & (piece_bb[Bishop] | queens)
+            | KNIGHT_ATTACKS[square] & piece_bb[Knight]
+            | KING_ATTACKS[square] & piece_bb[King]
+        )
+        # Pawns attack, or push to, the square from behind it
+        rank_step = -PAWN_RANK_STEP[player]
+        if move_type == "attack":
+            attackers |= PAWN_ATTACKS[rank_step][square] & piece_bb[Pawn]
+        else:
+            for target in RAYS[rank_step, 0][square][:2]:
+                pawn = self.board[target] if (own & piece_bb[Pawn]) >> target & 1 else None
+                if pawn and self.get_moves_bb(pawn, "move") >> square & 1:
+                    attackers |= 1 << target
+        return attackers & own
+
+    def search(self, player: Side, depth: int) -> Optional[tuple[Position, Position]]:
+        """
+        Find the best (src, dst) for player by iterative deepening alpha-beta search up to depth plies, or None when
+        player has no legal move. Only material is evaluated, castling is not considered and pawns are not promoted.
+        """
+        if depth < 1:
+            raise ValueError(f"Search depth must be at least 1, got {depth}")
+
+        best_move = None
+        for current_depth in range(1, depth + 1):
+            moves = self._ordered_moves(player)
+            if best_move:
+                # Search the best move of the previous iteration first, it gives the tightest bounds
+                moves.remove(best_move)
+                moves.insert(0, best_move)
+            alpha, best_move = -2 * MATE_SCORE, None
+            for src, dst in moves:
+                undo = self._make(src, dst)
+                try:
+                    if self._is_king_in_check(player):
+                        continue
+                    score = -self.alphabeta(current_depth - 1, -2 * MATE_SCORE, -alpha, OPPONENT[player])
+                finally:
+                    self._unmake(undo)
+                # Ties keep the earlier move, which is the previous iteration's best
+                if best_move is None or score > alpha:
+                    alpha, best_move = score, (src, dst)
+            if best_move is None:
+                return None
+        return Position.from_square(best_move[0]), Position.from_square(best_move[1])
+
+    def alphabeta(self, depth: int, alpha: int, beta: int, player: Side) -> int:
+        """Negamax score of the position for player, searched depth plies deep within the (alpha, beta) window"""
+        if depth == 0:
+            return self.evaluate(player)
+
+        has_legal_move = False
+        for src, dst in self._ordered_moves(player):
+            undo = self._make(src, dst)
+            try:
+                if self._is_king_in_check(player):
+                    continue
+                has_legal_move = True
+                score = -self.alphabeta(depth - 1, -beta, -alpha, OPPONENT[player])
+            finally:
+                self._unmake(undo)
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
                     break
-                else:
-                    if (piece := self.get_piece(move)) and piece.side == player:
-                        # We have found a piece, now to determine if it is attacking where we started
-                        if position in self.get_possible_moves(piece, move_type):
-                            pieces_attacking_position.append(piece)
-        return pieces_attacking_position
+
+        if not has_legal_move:
+            # Checkmate, or stalemate which is a draw
+            return -MATE_SCORE - depth if self._is_king_in_check(player) else 0
+        return alpha
+
+    def evaluate(self, player: Side) -> int:
+        """Material balance from player's point of view"""
+        own, opponent = self.side_bb[player], self.side_bb[OPPONENT[player]]
+        score = 0
+        for piece_class, value in PIECE_VALUES.items():
+            piece_bb = self.piece_bb[piece_class]
+            score += value * ((piece_bb & own).bit_count() - (piece_bb & opponent).bit_count())
+        return score
+
+    def _ordered_moves(self, player: Side) -> list[tuple[int, int]]:
+        """
+        (src, dst) squares of player's moves that ignore whether they leave the King in check. Captures come first,
+        most valuable victim then least valuable attacker, followed by the quiet moves.
+        """
+        captures, quiets = [], []
+        opponent = self.side_bb[OPPONENT[player]]
+        for src in iter_squares(self.side_bb[player]):
+            piece = self.board[src]
+            for dst in iter_squares(self.get_moves_bb(piece, "attack") & opponent):
+                captures.append(
+                    (PIECE_VALUES[self.board[dst].__class__] * 10 - PIECE_VALUES[piece.__class__], src, dst)
+                )
+            for dst in iter_squares(self.get_moves_bb(piece, "move") & ~self.occupied):
+                quiets.append((src, dst))
+        captures.sort(key=lambda capture: capture[0], reverse=True)
+        return [(src, dst) for _, src, dst in captures] + quiets
 
     def default_pieces(self) -> list[ChessPiece]:
         pawns = []
-        for file in [0, 1, 2, 3, 4, 5, 6, 7, 8]:
-            pawns.append(Pawn(position=Position(1, file), side=Side.BLACK))
-            pawns.append(Pawn(position=Position(6, file), side=Side.WHITE))
-            pass
-        return pawns + [
-            Rook(position=Position(0, 0), side=Side.BLACK),
-            Rook(position=Position(0, 7), side=Side.BLACK),
-            Rook(position=Position(7, 0), side=Side.WHITE),
-            Rook(position=Position(7, 7), side=Side.WHITE),
-            Bishop(position=Position(0, 2), side=Side.BLACK),
-            Bishop(position=Position(0, 5), side=Side.BLACK),
-            Bishop(position=Position(7, 2), side=Side.WHITE),
-            Bishop(position=Position(7, 5), side=Side.WHITE),
-            Knight(position=Position(0, 1), side=Side.BLACK),
-            Knight(position=Position(0, 6), side=Side.BLACK),
-            Knight(position=Position(7, 1), side=Side.WHITE),
-            Knight(position=Position(7, 6), side=Side.WHITE),
-            Queen(position=Position(7, 3), side=Side.WHITE),
-            Queen(position=Position(0, 3), side=Side.BLACK),
-            King(position=Position(7, 4), side=Side.WHITE),
-            King(position=Position(0, 4), side=Side.BLACK),
+        for file in range(8):
+            pawns.append(Pawn(position=Position.of(1, file), side=Side.BLACK))
+            pawns.append(Pawn(position=Position.of(6, file), side=Side.WHITE))
+        pieces = pawns + [
+            Rook(position=Position.of(0, 0), side=Side.BLACK),
+            Rook(position=Position.of(0, 7), side=Side.BLACK),
+            Rook(position=Position.of(7, 0), side=Side.WHITE),
+            Rook(position=Position.of(7, 7), side=Side.WHITE),
+            Bishop(position=Position.of(0, 2), side=Side.BLACK),
+            Bishop(position=Position.of(0, 5), side=Side.BLACK),
+            Bishop(position=Position.of(7, 2), side=Side.WHITE),
+            Bishop(position=Position.of(7, 5), side=Side.WHITE),
+            Knight(position=Position.of(0, 1), side=Side.BLACK),
+            Knight(position=Position.of(0, 6), side=Side.BLACK),
+            Knight(position=Position.of(7, 1), side=Side.WHITE),
+            Knight(position=Position.of(7, 6), side=Side.WHITE),
+            Queen(position=Position.of(7, 3), side=Side.WHITE),
+            Queen(position=Position.of(0, 3), side=Side.BLACK),
+            King(position=Position.of(7, 4), side=Side.WHITE),
+            King(position=Position.of(0, 4), side=Side.BLACK),
         ]
+        assert len(pieces) == 32
+        return pieces
 
 
 class ProvisionalMove:
@@ -328,19 +549,21 @@ class ProvisionalMove:
 
     def __enter__(self):
         self.move.type = self.chess_board.validate_move(self.move, self.player)
-        self.original_dst_piece = self.chess_board.get_piece(self.move.dst)
-        self.chess_board.board[self.move.src] = None
-        self.chess_board.board[self.move.dst] = self.move.piece
-        self.move.piece.position = self.move.dst
+        self.original_dst_piece = self.chess_board._remove_piece(self.move.dst.square)
+        self.chess_board._remove_piece(self.move.src.square)
+        self.chess_board._place_piece(self.move.piece, self.move.dst.square)
+        self.move.piece.square = self.move.dst.square
         self.src_piece.has_been_moved = True
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type or not self._committed:
             # rollback
-            self.chess_board.board[self.move.src] = self.move.piece
-            self.chess_board.board[self.move.dst] = self.original_dst_piece
-            self.move.piece.position = self.move.src
+            self.chess_board._remove_piece(self.move.dst.square)
+            self.chess_board._place_piece(self.move.piece, self.move.src.square)
+            if self.original_dst_piece:
+                self.chess_board._place_piece(self.original_dst_piece, self.move.dst.square)
+            self.move.piece.square = self.move.src.square
             self.move.piece.has_been_moved = self._was_piece_moved_before
 
     def commit(self):
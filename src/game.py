@@ -1,18 +1,20 @@
+import logging
 from dataclasses import dataclass
-from datetime import datetime
 from enum import Enum
 from functools import cached_property
-from time import sleep
+from time import monotonic_ns, sleep
 from typing import Optional
 
 import pyxel
 
 from chess import Side, Position, ChessBoard, ChessPiece, InvalidMove
 from pieces import MoveEffect
-from src.lichess_client import LiChess
+from lichess import LiChess
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True)
 class MoveAnimation:
     piece: ChessPiece
     dst: Position
@@ -72,7 +74,8 @@ class Game:
         self.outcome: Optional[Win | Draw] = None
         self.board = ChessBoard()
         self.move_history = []
-        self.animations: dict[Position, MoveAnimation] = {}
+        # Keyed by the square the piece is moving to, so drawing can match pieces by square
+        self.animations: dict[int, MoveAnimation] = {}
 
     @cached_property
     def lichess(self):
@@ -85,7 +88,7 @@ class Game:
     def update(self) -> None:
         self.turn.update_timer()
         for event in self.lichess.pop_events():
-            print(event)
+            logger.debug("%s", event)
             if event["type"] == "gameState":
                 moves = event["moves"].split(" ")
                 move_for = Side.WHITE if bool(len(moves) % 2) else Side.BLACK
@@ -96,20 +99,20 @@ class Game:
 
     def move(self, src: Position, dst: Position) -> None:
         move = self.board.move(src, dst, self.turn.current_player.side)
-        print(move.long_algebraic_notation)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s", move.long_algebraic_notation)
         self.move_history.append(move)
         if MoveEffect.CHECKMATE in move.side_effects:
             self.outcome = Win(self.turn.current_player.side, WinReason.CHECKMATE)
         self.turn.toggle_current_player()
 
     def update_animations(self) -> None:
-        completed = set()
-        for position, animation in self.animations.items():
+        in_progress = {}
+        for square, animation in self.animations.items():
             animation.update_progress()
-            if animation.progress > 1:
-                completed.add(position)
-        for pos in completed:
-            self.animations.pop(pos)
+            if animation.progress <= 1:
+                in_progress[square] = animation
+        self.animations = in_progress
 
     def handle_board_left_click(self):
         if clicked_position := self._get_clicked_position():
@@ -117,49 +120,73 @@ class Game:
                 try:
                     self.move(self.selected_position, clicked_position)
                 except InvalidMove as im:
-                    print(im)
+                    logger.debug("%s", im)
                 else:
-                    self.animations[clicked_position] = MoveAnimation(
+                    self.animations[clicked_position.square] = MoveAnimation(
                         self.board.get_piece(clicked_position), self.selected_position
                     )
                     return
                 finally:
                     self.selected_position = None
-        if (piece := self.board.get_piece(clicked_position)) and piece.side == self.turn.current_player.side:
+        if (
+            clicked_position
+            and (piece := self.board.get_piece(clicked_position))
+            and piece.side == self.turn.current_player.side
+        ):
             # Only allow for selecting position corresponding to a piece of a current players
             self.selected_position = clicked_position
 
     def _get_clicked_position(self) -> Optional[Position]:
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            # convert screen position to board position
-            if self.player_perspective == Side.WHITE:
-                rank = int(pyxel.mouse_y / 16) - 1
-                file = int(pyxel.mouse_x / 16) - 1
-            else:
-                rank = 7 - int(pyxel.mouse_y / 16) + 1
-                file = 7 - int(pyxel.mouse_x / 16) + 1
+        # convert screen position to board position, only called once App has seen a left click this frame
+        if self.player_perspective is Side.WHITE:
+            rank = pyxel.mouse_y // 16 - 1
+            file = pyxel.mouse_x // 16 - 1
+        else:
+            rank = 7 - pyxel.mouse_y // 16 + 1
+            file = 7 - pyxel.mouse_x // 16 + 1
 
-            # Only return a position if a board tile was clicked
-            if 0 <= rank < 8 and 0 <= file < 8:
-                return Position(rank, file)
+        # Only return a position if a board tile was clicked
+        if 0 <= rank < 8 and 0 <= file < 8:
+            return Position.of(rank, file)
 
 
 class Turn:
     def __init__(self, player_1: Player, player_2: Player):
-        self.current_player, self.waiting_player = (player_1, player_2) if player_1.side == Side.WHITE else (player_2, player_1)
+        if player_1.side is Side.WHITE:
+            self.current_player, self.waiting_player = player_1, player_2
+        else:
+            self.current_player, self.waiting_player = player_2, player_1
         # Currently hard coded for 10min games
         self.timer = {self.current_player: 10 * 60 * 1000, self.waiting_player: 10 * 60 * 1000}
-        self.last_update_time = datetime.now()
+        self.last_update_time = monotonic_ns()
+        # Displayed "mm:ss" per player, only reformatted when the whole seconds left change
+        self._cached_secs = {player: ms // 1000 for player, ms in self.timer.items()}
+        self._cached_text = {player: self._format_timer(secs) for player, secs in self._cached_secs.items()}
 
     def toggle_current_player(self):
         self.current_player, self.waiting_player = self.waiting_player, self.current_player
 
     def get_mins_seconds_left(self, side: Side):
         player = self.current_player if side == self.current_player.side else self.waiting_player
-        return divmod(self.timer[player] / 1000, 60)
+        return divmod(self.timer[player] // 1000, 60)
+
+    def get_timer_text(self, side: Side) -> str:
+        player = self.current_player if side == self.current_player.side else self.waiting_player
+        return self._cached_text[player]
+
+    @staticmethod
+    def _format_timer(secs: int) -> str:
+        mins, secs = divmod(secs, 60)
+        return f"{mins:02d}:{secs:02d}"
 
     def update_timer(self):
-        self.timer[self.current_player] -= int((datetime.now() - self.last_update_time).microseconds / 1000)
+        # Only whole milliseconds are taken off the clock, the remainder carries over to the next update
+        elapsed_ms = (monotonic_ns() - self.last_update_time) // 1_000_000
+        self.timer[self.current_player] -= elapsed_ms
         if self.timer[self.current_player] < 0:
             self.timer[self.current_player] = 0
-        self.last_update_time = datetime.now()
+        self.last_update_time += elapsed_ms * 1_000_000
+        secs = self.timer[self.current_player] // 1000
+        if secs != self._cached_secs[self.current_player]:
+            self._cached_secs[self.current_player] = secs
+            self._cached_text[self.current_player] = self._format_timer(secs)
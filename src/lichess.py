@@ -1,11 +1,16 @@
+from collections import deque
 from threading import Thread
 
 from berserk import Client, TokenSession
 from dotenv import load_dotenv
+import logging
 import os
 
 
 load_dotenv()
+logger = logging.getLogger(__name__)
+
+STREAM_EVENTS_SIZE = 1024
 
 
 class LiChess:
@@ -13,24 +18,29 @@ class LiChess:
         self._session = TokenSession(os.getenv("API_TOKEN"))
         self._client = Client(session=self._session)
         self._stream = None
-        self.stream_events = []
+        # Filled by the watching thread and drained by the game loop, deque appends and pops are thread safe. Bounded
+        # in case events stop being popped, the oldest are then dropped first.
+        self.stream_events = deque(maxlen=STREAM_EVENTS_SIZE)
 
     def new_game(self):
         game = self._client.challenges.create_ai(level=1, clock_limit=1260, clock_increment=0, variant="standard")
         self._stream = self._client.board.stream_game_state(game["id"])
-        print(self._stream)
+        logger.debug("%s", self._stream)
         self.start_watching_thread()
 
     def start_watching_thread(self):
         def update_events():
             for event in self._stream:
+                if len(self.stream_events) == self.stream_events.maxlen:
+                    logger.warning("Dropping the oldest lichess event, events are not being popped")
                 self.stream_events.append(event)
         thread = Thread(target=update_events)
         thread.start()
 
     def pop_events(self):
-        events = self.stream_events.copy()
-        self.stream_events = []
+        events = []
+        while self.stream_events:
+            events.append(self.stream_events.popleft())
         return events
 
 # x = {'id': 'vE8cv1Qk', 'variant': {'key': 'standard', 'name': 'Standard', 'short': 'Std'}, 'speed': 'bullet', 'perf': 'bullet', 'rated': False, 'fen': 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', 'turns': 0, 'source': 'ai', 'status': {'id': 20, 'name': 'started'}, 'createdAt': 1693046497604, 'player': 'white'}
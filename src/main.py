@@ -1,19 +1,30 @@
+import logging
+import os
+from collections import defaultdict, deque
+from time import perf_counter_ns
+from typing import Optional
+
 import pyxel
 
 from game import Game, GameEvent, Win, WinReason
+from pieces import Side
 from ui import (
     Board,
     GameInfo,
     UIComponent,
-    ScrollUpButton,
-    ScrollDownButton,
     BOARD_WIDTH,
     GAME_INFO_WIDTH,
     BOARD_HEIGHT,
-    Button,
     GameOutcomeModal,
 )
 
+logger = logging.getLogger(__name__)
+
+# Set this environment variable (e.g. CHESS_PROFILE_DRAWS=1) to log per-component draw times at debug level
+PROFILE_DRAWS = bool(os.getenv("CHESS_PROFILE_DRAWS"))
+# Number of redrawn frames the draw profile is averaged over
+DRAW_PROFILE_FRAMES = 600
+
 
 class App:
     def __init__(self):
@@ -21,16 +32,30 @@ class App:
         pyxel.load("../assets/PIECES.pyxres")
         pyxel.mouse(visible=True)
         self.game = Game()
-        self.events = list()
+        self.events = deque()
         self.board_ui = Board()
         self.game_info_ui = GameInfo(self.events)
         self.outcome_modal = GameOutcomeModal(self.events)
+        # Everything the last drawn frame depended on, pyxel keeps the screen so an unchanged frame is not redrawn
+        self._drawn_state: Optional[tuple] = None
+        self._event_handlers = {
+            GameEvent.RESIGN: self._handle_resign,
+            GameEvent.OFFER_DRAW: self._handle_offer_draw,
+            GameEvent.RESTART_GAME: self._handle_restart_game,
+        }
+        # Time spent drawing each component, only measured when profiling draws
+        self._profile_draws = PROFILE_DRAWS
+        self._draw_ns: dict[str, int] = defaultdict(int)
+        self._profiled_frames = 0
         pyxel.run(self.update, self.draw)
 
     def update(self):
         """"""
-        self.maybe_handle_left_click()
-        self.maybe_handle_right_click()
+        # Most frames have no clicks, so only run the click handlers when a button was pressed
+        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            self.handle_left_click()
+        if pyxel.btnp(pyxel.MOUSE_BUTTON_RIGHT):
+            self.handle_right_click()
         self.handle_events()
         if not self.game.outcome:
             self.game.update()
@@ -39,66 +64,105 @@ class App:
         self.game.update_animations()
 
     def draw(self):
+        if not self.game.animations:
+            state = self._get_drawn_state()
+            if state == self._drawn_state:
+                return
+            self._drawn_state = state
+        else:
+            self._drawn_state = None
+
         pyxel.cls(0)
-        self.board_ui.draw(self.game)
-        # We copy() this list so the ui gets the value not reference, so it can react to state changes better
-        self.game_info_ui.draw(self.game.turn, self.game.move_history.copy())
-        self.outcome_modal.draw(self.game)
+        self._draw_component(self.board_ui, self.game)
+        # The history is passed by reference, MoveHistory tracks how much of it has been formatted
+        self._draw_component(self.game_info_ui, self.game.turn, self.game.move_history)
+        self._draw_component(self.outcome_modal, self.game)
+        if self._profile_draws:
+            self._maybe_log_draw_profile()
+
+    def _draw_component(self, component: UIComponent, *args) -> None:
+        if not self._profile_draws:
+            component.draw(*args)
+            return
+        start = perf_counter_ns()
+        component.draw(*args)
+        self._draw_ns[component.__class__.__name__] += perf_counter_ns() - start
+
+    def _maybe_log_draw_profile(self) -> None:
+        self._profiled_frames += 1
+        if self._profiled_frames == DRAW_PROFILE_FRAMES:
+            logger.debug(
+                "draw time per frame: %s",
+                ", ".join(f"{name} {ns // DRAW_PROFILE_FRAMES // 1000}us" for name, ns in self._draw_ns.items()),
+            )
+            self._draw_ns.clear()
+            self._profiled_frames = 0
+
+    def _get_drawn_state(self) -> tuple:
+        return (
+            self.game,
+            self.game.board.zobrist,
+            self.game.selected_position,
+            self.board_ui.player_perspective,
+            self.game.turn.get_timer_text(Side.WHITE),
+            self.game.turn.get_timer_text(Side.BLACK),
+            len(self.game.move_history),
+            self.game_info_ui.subcomponents[1].move_history_frame,
+            self.outcome_modal.hidden,
+            # pyxel draws the visible cursor into the screen, so it has to be cleared whenever the mouse moves
+            pyxel.mouse_x,
+            pyxel.mouse_y,
+        )
 
     def handle_events(self):
         while self.events:
-            event = self.events.pop()
-            if event == GameEvent.RESIGN:
-                print("handling resign")
-                self.game.outcome = Win(~self.game.turn.current_player.side, WinReason.RESIGNATION)
-            if event == GameEvent.OFFER_DRAW:
-                print("handling draw offer")
-            if event == GameEvent.RESTART_GAME:
-                print("handling restart game")
-                self.game = Game()
-                self.outcome_modal.hidden = True
-
-    def maybe_handle_left_click(self):
+            self._event_handlers[self.events.popleft()]()
+
+    def _handle_resign(self):
+        logger.debug("handling resign")
+        self.game.outcome = Win(~self.game.turn.current_player.side, WinReason.RESIGNATION)
+
+    def _handle_offer_draw(self):
+        logger.debug("handling draw offer")
+
+    def _handle_restart_game(self):
+        logger.debug("handling restart game")
+        self.game = Game()
+        self.outcome_modal.hidden = True
+
+    def handle_left_click(self):
         if component := self._get_clicked_ui_component():
-            print(component)
-            if component.__class__ == Board:
-                self.game.handle_board_left_click()
-            elif isinstance(component, ScrollUpButton) or isinstance(component, ScrollDownButton):
-                component.on_click(self.game.move_history)
-            elif isinstance(component, Button):
-                component.on_click()
-
-    def _get_clicked_ui_component(self) -> UIComponent:
-        # todo: this is just a quick implementation, needs to handle any level of depth
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            ui_components = [
-                component
-                for component in [self.outcome_modal, self.board_ui, self.game_info_ui]
-                if not component.hidden
-            ]
-            for component in ui_components:
-                if component.coords_are_within_element(pyxel.mouse_x, pyxel.mouse_y):
-                    for subcomponent in component.subcomponents:
-                        if subcomponent.coords_are_within_element(pyxel.mouse_x, pyxel.mouse_y):
-                            for subsubcomponent in subcomponent.subcomponents:
-                                if subsubcomponent.coords_are_within_element(pyxel.mouse_x, pyxel.mouse_y):
-                                    return subsubcomponent
-                            return subcomponent
-                    return component
-
-    def maybe_handle_right_click(self):
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_RIGHT):
-            self.game.selected_position = None
+            logger.debug("%s", component)
+            component.handle_click(self.game)
+
+    def _get_clicked_ui_component(self) -> Optional[UIComponent]:
+        mouse_x, mouse_y = pyxel.mouse_x, pyxel.mouse_y
+        for component in (self.outcome_modal, self.board_ui, self.game_info_ui):
+            if not component.hidden and component.coords_are_within_element(mouse_x, mouse_y):
+                return self._get_innermost_component(component, mouse_x, mouse_y)
+
+    def _get_innermost_component(self, component: UIComponent, x: int, y: int) -> UIComponent:
+        """The deepest of component's subcomponents containing the coords, given that component contains them"""
+        for subcomponent in component.subcomponents:
+            if subcomponent.coords_are_within_element(x, y):
+                return self._get_innermost_component(subcomponent, x, y)
+        return component
+
+    def handle_right_click(self):
+        self.game.selected_position = None
 
     def maybe_handle_run_out_of_time(self):
-        if self.game.turn.timer[self.game.turn.current_player] <= 0:
-            self.game.outcome = Win(~self.game.turn.current_side, WinReason.TIME)
+        turn = self.game.turn
+        if turn.timer[turn.current_player] <= 0:
+            self.game.outcome = Win(~turn.current_player.side, WinReason.TIME)
 
     def maybe_handle_winner_found(self):
         if self.game.outcome:
             self.outcome_modal.hidden = False
 
 
+if PROFILE_DRAWS:
+    logging.basicConfig(level=logging.DEBUG)
 App()
 
 # todo:
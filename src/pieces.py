@@ -1,19 +1,33 @@
 from dataclasses import dataclass
-from enum import Flag, auto, Enum
+from enum import Flag, auto, Enum, IntEnum
 
 FILE_LABELS = ["a", "b", "c", "d", "e", "f", "g", "h"]
 RANK_LABELS = ["8", "7", "6", "5", "4", "3", "2", "1"]
+# SQ_NAME[square] is the algebraic name of the square, e.g. "e4"
+SQ_NAME = tuple(f"{FILE_LABELS[file]}{RANK_LABELS[rank]}" for rank in range(8) for file in range(8))
 
 
 class Side(Flag):
     WHITE = auto()
     BLACK = auto()
 
+    # Members are singletons compared by identity, so hash them the same way rather than through Enum's
+    # Python-level name hash. Sides key the board's bitboard dicts, which are probed on every move lookup.
+    __hash__ = object.__hash__
 
-class MoveType(Enum):
-    MOVE = "-"
-    ATTACK = "x"
-    CASTLE = "O"
+
+# OPPONENT[side] is the other side, a dict lookup is far cheaper than inverting the Flag with ~side
+OPPONENT = {Side.WHITE: Side.BLACK, Side.BLACK: Side.WHITE}
+
+
+class MoveType(IntEnum):
+    MOVE = 0
+    ATTACK = 1
+    CASTLE = 2
+
+
+# MOVE_TYPE_SEPARATORS[move_type] separates the source and destination squares in long algebraic notation
+MOVE_TYPE_SEPARATORS = ("-", "x", "O")
 
 
 class MoveEffect(Enum):
@@ -22,29 +36,49 @@ class MoveEffect(Enum):
     PROMOTION = "=Q"
 
 
-@dataclass(eq=True, frozen=True)
+@dataclass(eq=True, frozen=True, slots=True)
 class Position:
     rank: int
     file: int
 
     @property
     def algebraic_notation_name(self):
-        return f"{FILE_LABELS[self.file]}{RANK_LABELS[self.rank]}"
+        return SQ_NAME[self.rank * 8 + self.file]
+
+    @property
+    def square(self) -> int:
+        """Index of the position used by the board internals"""
+        return self.rank * 8 + self.file
 
     def __add__(self, x: "Position") -> "Position":
-        return Position(self.rank + x.rank, self.file + x.file)
+        return Position.of(self.rank + x.rank, self.file + x.file)
 
     def __str__(self) -> str:
-        return f"{FILE_LABELS[self.file]}{RANK_LABELS[self.rank]}"
+        return SQ_NAME[self.rank * 8 + self.file]
 
     @staticmethod
     def position_for_alg_coord(coord: str) -> "Position":
         assert len(coord) == 2
-        return Position(file=FILE_LABELS.index(coord[0]), rank=RANK_LABELS.index(coord[1]))
+        return Position.of(file=FILE_LABELS.index(coord[0]), rank=RANK_LABELS.index(coord[1]))
+
+    @staticmethod
+    def from_square(square: int) -> "Position":
+        return ALL_POSITIONS[square]
+
+    @staticmethod
+    def of(rank: int, file: int) -> "Position":
+        """The shared instance for a square on the board, positions off the board are built as usual"""
+        if 0 <= rank < 8 and 0 <= file < 8:
+            return ALL_POSITIONS[rank * 8 + file]
+        return Position(rank, file)
 
 
+# Positions are immutable, so every square on the board gets a single shared instance, indexed by square
+ALL_POSITIONS = tuple(Position(rank, file) for rank in range(8) for file in range(8))
 
-@dataclass
+
+
+@dataclass(frozen=True, slots=True)
 class Vector:
     rank: int
     file: int
@@ -52,26 +86,34 @@ class Vector:
 
 
 class ChessPiece:
+    __slots__ = ("square", "side", "has_been_moved")
+
     def __init__(self, position: Position, side: Side):
-        self.position = position
+        # Squares are indexed by rank * 8 + file, so a position off the board would alias onto another square
+        assert 0 <= position.rank < 8 and 0 <= position.file < 8, f"{position!r} is not on the board"
+        self.square = position.square
         self.side = side
         self.has_been_moved = False
 
     @property
-    def algebraic_notation_name(self):
-        return self.__class__.__name__[0].upper()
+    def position(self) -> Position:
+        return Position.from_square(self.square)
+
+    algebraic_notation_name: str
+    # Row of the piece's sprite in the pieces image bank
+    image_row: int
 
     @property
-    def move_set(self) -> list[Vector]:
+    def move_set(self) -> tuple[Vector, ...]:
         raise NotImplemented()
 
     @property
-    def attack_set(self) -> list[Vector]:
+    def attack_set(self) -> tuple[Vector, ...]:
         """Unless overridden this will be the same as the move set"""
         return self.move_set
 
     @property
-    def special_moves(self) -> dict[MoveType, list[Position]]:
+    def special_moves(self) -> dict[MoveType, tuple[Position, ...]]:
         return {}
 
     def __str__(self) -> str:
@@ -81,125 +123,171 @@ class ChessPiece:
 class Pawn(ChessPiece):
     """Pawn"""
 
-    @property
-    def algebraic_notation_name(self):
-        """Pawns are identified by the lack of a name"""
-        return ""
+    __slots__ = ()
+
+    # Pawns are identified by the lack of a name
+    algebraic_notation_name = ""
+    image_row = 0
 
     @property
     def direction_of_movement(self):
-        return -1 if self.side == Side.WHITE else 1
+        return -1 if self.side is Side.WHITE else 1
 
     @property
     def default_rank(self):
-        return 6 if self.side == Side.WHITE else 1
+        return 6 if self.side is Side.WHITE else 1
 
     @property
     def promotion_rank(self):
-        return 0 if self.side == Side.WHITE else 7
+        return 0 if self.side is Side.WHITE else 7
+
+    # Keyed by side and whether the pawn is still on its default rank
+    _MOVE_SETS = {
+        (Side.WHITE, False): (Vector(rank=-1, file=0, magnitude=1),),
+        (Side.WHITE, True): (Vector(rank=-1, file=0, magnitude=2),),
+        (Side.BLACK, False): (Vector(rank=1, file=0, magnitude=1),),
+        (Side.BLACK, True): (Vector(rank=1, file=0, magnitude=2),),
+    }
+    _ATTACK_SETS = {
+        Side.WHITE: (Vector(rank=-1, file=1, magnitude=1), Vector(rank=-1, file=-1, magnitude=1)),
+        Side.BLACK: (Vector(rank=1, file=1, magnitude=1), Vector(rank=1, file=-1, magnitude=1)),
+    }
 
     @property
-    def move_set(self) -> list[Vector]:
+    def move_set(self) -> tuple[Vector, ...]:
         """Get relative positions that are possible for this piece, not considering the state of the board"""
-        magnitude = 2 if self.position.rank == self.default_rank else 1
-        moves = [Vector(rank=1 * self.direction_of_movement, file=0, magnitude=magnitude)]
-        return moves
+        return self._MOVE_SETS[self.side, self.square >> 3 == self.default_rank]
 
     @property
-    def attack_set(self) -> list[Vector]:
-        return [
-            Vector(rank=1 * self.direction_of_movement, file=1, magnitude=1),
-            Vector(rank=1 * self.direction_of_movement, file=-1, magnitude=1),
-        ]
+    def attack_set(self) -> tuple[Vector, ...]:
+        return self._ATTACK_SETS[self.side]
 
 
 class Rook(ChessPiece):
     """"""
 
-    @property
-    def move_set(self) -> list[Vector]:
-        """Get relative positions that are possible for this piece, not considering the state of the board"""
-        return [
-            Vector(rank=1, file=0, magnitude=8),
-            Vector(rank=-1, file=0, magnitude=8),
-            Vector(rank=0, file=1, magnitude=8),
-            Vector(rank=0, file=-1, magnitude=8),
-        ]
+    __slots__ = ()
+    algebraic_notation_name = "R"
+    image_row = 1
+
+    move_set = (
+        Vector(rank=1, file=0, magnitude=8),
+        Vector(rank=-1, file=0, magnitude=8),
+        Vector(rank=0, file=1, magnitude=8),
+        Vector(rank=0, file=-1, magnitude=8),
+    )
 
 
 class Bishop(ChessPiece):
     """"""
 
-    @property
-    def move_set(self) -> list[Vector]:
-        return [
-            Vector(rank=1, file=1, magnitude=8),
-            Vector(rank=1, file=-1, magnitude=8),
-            Vector(rank=-1, file=1, magnitude=8),
-            Vector(rank=-1, file=-1, magnitude=8),
-        ]
+    __slots__ = ()
+    algebraic_notation_name = "B"
+    image_row = 2
+
+    move_set = (
+        Vector(rank=1, file=1, magnitude=8),
+        Vector(rank=1, file=-1, magnitude=8),
+        Vector(rank=-1, file=1, magnitude=8),
+        Vector(rank=-1, file=-1, magnitude=8),
+    )
 
 
 class Knight(ChessPiece):
     """"""
 
-    @property
-    def algebraic_notation_name(self):
-        return "N"
+    __slots__ = ()
 
-    @property
-    def move_set(self) -> list[Vector]:
-        return [
-            Vector(rank=2, file=1, magnitude=1),
-            Vector(rank=2, file=-1, magnitude=1),
-            Vector(rank=-2, file=1, magnitude=1),
-            Vector(rank=-2, file=-1, magnitude=1),
-            Vector(rank=1, file=2, magnitude=1),
-            Vector(rank=1, file=-2, magnitude=1),
-            Vector(rank=-1, file=2, magnitude=1),
-            Vector(rank=-1, file=-2, magnitude=1),
-        ]
+    algebraic_notation_name = "N"
+    image_row = 3
+
+    move_set = (
+        Vector(rank=2, file=1, magnitude=1),
+        Vector(rank=2, file=-1, magnitude=1),
+        Vector(rank=-2, file=1, magnitude=1),
+        Vector(rank=-2, file=-1, magnitude=1),
+        Vector(rank=1, file=2, magnitude=1),
+        Vector(rank=1, file=-2, magnitude=1),
+        Vector(rank=-1, file=2, magnitude=1),
+        Vector(rank=-1, file=-2, magnitude=1),
+    )
 
 
 class Queen(ChessPiece):
     """"""
 
-    @property
-    def move_set(self) -> list[Vector]:
-        return [
-            Vector(rank=1, file=1, magnitude=8),
-            Vector(rank=1, file=-1, magnitude=8),
-            Vector(rank=-1, file=1, magnitude=8),
-            Vector(rank=-1, file=-1, magnitude=8),
-            Vector(rank=1, file=0, magnitude=8),
-            Vector(rank=-1, file=0, magnitude=8),
-            Vector(rank=0, file=1, magnitude=8),
-            Vector(rank=0, file=-1, magnitude=8),
-        ]
+    __slots__ = ()
+    algebraic_notation_name = "Q"
+    image_row = 4
+
+    move_set = (
+        Vector(rank=1, file=1, magnitude=8),
+        Vector(rank=1, file=-1, magnitude=8),
+        Vector(rank=-1, file=1, magnitude=8),
+        Vector(rank=-1, file=-1, magnitude=8),
+        Vector(rank=1, file=0, magnitude=8),
+        Vector(rank=-1, file=0, magnitude=8),
+        Vector(rank=0, file=1, magnitude=8),
+        Vector(rank=0, file=-1, magnitude=8),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class CastlePath:
+    """Squares involved in castling towards one side of the board"""
+
+    rook_src: int
+    rook_dst: int
+    between: tuple[int, ...]
+    between_mask: int
+
+
+def _castle_path(rank: int, kingside: bool) -> CastlePath:
+    rank_start = rank * 8
+    if kingside:
+        between = (rank_start + 5, rank_start + 6)
+        rook_src, rook_dst = rank_start + 7, rank_start + 5
+    else:
+        between = (rank_start + 1, rank_start + 2, rank_start + 3)
+        rook_src, rook_dst = rank_start, rank_start + 3
+    return CastlePath(rook_src, rook_dst, between, sum(1 << square for square in between))
 
 
 class King(ChessPiece):
-    @property
-    def starting_position(self):
-        return Position(7, 4) if self.side == Side.WHITE else Position(0, 4)
+    __slots__ = ()
+    algebraic_notation_name = "K"
+    image_row = 5
+
+    # CASTLE_PATHS[rank, kingside], keyed by the King's rank like its castling destinations
+    CASTLE_PATHS = {(rank, kingside): _castle_path(rank, kingside) for rank in range(8) for kingside in (True, False)}
 
     @property
-    def move_set(self) -> list[Vector]:
-        return [
-            Vector(rank=1, file=1, magnitude=1),
-            Vector(rank=1, file=-1, magnitude=1),
-            Vector(rank=-1, file=1, magnitude=1),
-            Vector(rank=-1, file=-1, magnitude=1),
-            Vector(rank=1, file=0, magnitude=1),
-            Vector(rank=-1, file=0, magnitude=1),
-            Vector(rank=0, file=1, magnitude=1),
-            Vector(rank=0, file=-1, magnitude=1),
-        ]
+    def starting_position(self):
+        return Position.of(7, 4) if self.side is Side.WHITE else Position.of(0, 4)
+
+    move_set = (
+        Vector(rank=1, file=1, magnitude=1),
+        Vector(rank=1, file=-1, magnitude=1),
+        Vector(rank=-1, file=1, magnitude=1),
+        Vector(rank=-1, file=-1, magnitude=1),
+        Vector(rank=1, file=0, magnitude=1),
+        Vector(rank=-1, file=0, magnitude=1),
+        Vector(rank=0, file=1, magnitude=1),
+        Vector(rank=0, file=-1, magnitude=1),
+    )
+
+    # Castling destinations of an unmoved King, keyed by its rank
+    _CASTLE_MOVES = {rank: {MoveType.CASTLE: (Position.of(rank, 2), Position.of(rank, 6))} for rank in range(8)}
 
     @property
-    def special_moves(self) -> dict[MoveType, list[Position]]:
+    def special_moves(self) -> dict[MoveType, tuple[Position, ...]]:
         if not self.has_been_moved:
-            return {
-                MoveType.CASTLE: [Position(rank=self.position.rank, file=2), Position(rank=self.position.rank, file=6)]
-            }
+            return self._CASTLE_MOVES[self.square >> 3]
         return {}
+
+
+# Pawn push move sets keyed by side and then by rank, so the pawn's push targets can be looked up by its square
+# without building a Pawn to read its move_set.
+PAWN_MOVE_SETS: dict[Side, tuple[tuple[Vector, ...], ...]] = {
+    side: tuple(Pawn(Position.of(rank, 0), side).move_set for rank in range(8)) for side in (Side.WHITE, Side.BLACK)
+}
@@ -1,10 +1,15 @@
+import logging
+from collections import deque
 from typing import Callable, Optional, Protocol
 
 import pyxel
 
+from bitboards import iter_squares
 from chess import ChessBoard, Move
 from game import Turn, Game, MoveAnimation, GameEvent
-from pieces import Position, Side
+from pieces import FILE_LABELS, RANK_LABELS, Side
+
+logger = logging.getLogger(__name__)
 
 
 TILE_WIDTH = 16
@@ -16,17 +21,15 @@ BOARD_HEIGHT = TILE_HEIGHT * 10
 GAME_INFO_WIDTH = TILE_WIDTH * 4
 GAME_INFO_HEIGHT = TILE_HEIGHT * 10
 
-IMAGE_LOCATION_FOR_PIECE = {
-    "pawn": 0,
-    "rook": 1,
-    "bishop": 2,
-    "knight": 3,
-    "queen": 4,
-    "king": 5,
-}
+# Screen coordinates of the left / top edge of the board's tile columns and rows, the outer ones hold the labels
+SCREEN_X = tuple(column * TILE_WIDTH for column in range(10))
+SCREEN_Y = tuple(row * TILE_HEIGHT for row in range(10))
+FILE_LABEL_X = tuple(x + TILE_WIDTH // 2 - 2 for x in SCREEN_X)
+RANK_LABEL_X = tuple(x + TILE_WIDTH // 2 - 1 for x in SCREEN_X)
+LABEL_Y = tuple(y + TILE_HEIGHT // 2 - 2 for y in SCREEN_Y)
 
-FILE_LABELS = ["a", "b", "c", "d", "e", "f", "g", "h"]
-RANK_LABELS = ["8", "7", "6", "5", "4", "3", "2", "1"]
+# DRAW_ORDER[square] ranks squares file by file, the order pieces are drawn in so moving pieces layer consistently
+DRAW_ORDER = tuple((square & 7) * 8 + (square >> 3) for square in range(64))
 
 
 class UIComponent:
@@ -44,6 +47,9 @@ class UIComponent:
     def coords_are_within_element(self, x: int, y: int) -> bool:
         return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
 
+    def handle_click(self, game: Game) -> None:
+        """Respond to being the clicked component, most components don't"""
+
 
 class Clickable(Protocol):
     def on_click(self, *args: Optional[list], **kwargs: Optional[dict]) -> None:
@@ -57,51 +63,63 @@ class Board(UIComponent):
         self.width = TILE_WIDTH * 10
         self.height = TILE_HEIGHT * 10
         self.background_colour = 5
+        # Labels and tiles only change with the perspective, so they are drawn once into an image and blitted
+        self._background = pyxel.Image(BOARD_WIDTH, BOARD_HEIGHT)
+        # Pieces at rest are likewise drawn into an image, redrawn only when the position (zobrist) changes
+        self._pieces_layer = pyxel.Image(BOARD_WIDTH, BOARD_HEIGHT)
+        self._pieces_layer_zobrist: Optional[int] = None
         self.player_perspective = Side.WHITE
 
-    def draw(
-        self,
-        game: Game,
-    ) -> None:
-        pyxel.rect(0, 0, TILE_WIDTH * 10, TILE_HEIGHT * 10, 5)
+    def handle_click(self, game: Game) -> None:
+        game.handle_board_left_click()
+
+    @property
+    def player_perspective(self) -> Side:
+        return self._player_perspective
+
+    @player_perspective.setter
+    def player_perspective(self, side: Side) -> None:
+        self._player_perspective = side
+        # Screen column / row that each file / rank is drawn in from this perspective, the labels take up the
+        # outermost columns and rows
+        self._file_column = tuple(file + 1 if side is Side.WHITE else 8 - file for file in range(8))
+        self._rank_row = tuple(rank + 1 if side is Side.WHITE else 8 - rank for rank in range(8))
+        self._file_x = tuple(SCREEN_X[column] for column in self._file_column)
+        self._rank_y = tuple(SCREEN_Y[row] for row in self._rank_row)
+        self._render_background()
+        self._pieces_layer_zobrist = None
+
+    def _render_background(self) -> None:
+        image = self._background
+        image.rect(0, 0, TILE_WIDTH * 10, TILE_HEIGHT * 10, 5)
 
         # Draw file labels
         for file in range(8):
             for y in (0, 9):
-                pyxel.text(
-                    self._x_index_for_file(file) * TILE_WIDTH + TILE_WIDTH / 2 - 2,
-                    y * TILE_HEIGHT + TILE_HEIGHT / 2 - 2,
-                    FILE_LABELS[file],
-                    col=7,
-                )
+                image.text(FILE_LABEL_X[self._file_column[file]], LABEL_Y[y], FILE_LABELS[file], 7)
 
         # Draw rank labels
         for rank in range(8):
             for x in (0, 9):
-                pyxel.text(
-                    x * TILE_WIDTH + TILE_WIDTH / 2 - 1,
-                    (self._y_index_for_rank(rank) * TILE_HEIGHT) + TILE_HEIGHT / 2 - 2,
-                    RANK_LABELS[rank],
-                    col=7,
-                )
+                image.text(RANK_LABEL_X[x], LABEL_Y[self._rank_row[rank]], RANK_LABELS[rank], 7)
 
         # Draw board tiles
         for file in range(8):
             for rank in range(8):
                 colour = 4 if (rank + file) % 2 else 15
-                pyxel.rect(
-                    (file + 1) * TILE_WIDTH,
-                    (rank + 1) * TILE_HEIGHT,
-                    TILE_WIDTH,
-                    TILE_HEIGHT,
-                    colour,
-                )
+                image.rect(SCREEN_X[file + 1], SCREEN_Y[rank + 1], TILE_WIDTH, TILE_HEIGHT, colour)
+
+    def draw(
+        self,
+        game: Game,
+    ) -> None:
+        pyxel.blt(0, 0, self._background, 0, 0, BOARD_WIDTH, BOARD_HEIGHT)
 
         # Draw selected border
         if game.selected_position:
             pyxel.blt(
-                self._x_index_for_file(game.selected_position.file) * TILE_WIDTH,
-                self._y_index_for_rank(game.selected_position.rank) * TILE_HEIGHT,
+                self._file_x[game.selected_position.file],
+                self._rank_y[game.selected_position.rank],
                 2,
                 0,
                 0,
@@ -112,49 +130,45 @@ class Board(UIComponent):
 
         self.draw_pieces(game.board, game.animations)
 
-    def draw_pieces(self, board: ChessBoard, animations: dict[Position, MoveAnimation]) -> None:
-        for file in range(8):
-            for rank in range(8):
-                if animation := animations.get(Position(rank, file)):
-                    draw_file = animation.dst.file + ((file - animation.dst.file) * animation.progress)
-                    draw_rank = animation.dst.rank + ((rank - animation.dst.rank) * animation.progress)
-                else:
-                    draw_file = file
-                    draw_rank = rank
-
-                if piece := board.get_piece(Position(rank, file)):
-                    pyxel.blt(
-                        self._x_index_for_file(draw_file) * TILE_WIDTH,
-                        self._y_index_for_rank(draw_rank) * TILE_HEIGHT,
-                        0,
-                        0 if piece.side == Side.WHITE else 1 * TILE_WIDTH,
-                        IMAGE_LOCATION_FOR_PIECE[piece.__class__.__name__.lower()] * TILE_HEIGHT,
-                        TILE_WIDTH,
-                        TILE_HEIGHT,
-                        colkey=2,
-                    )
-
-    def _x_index_for_file(self, file) -> int:
-        """
-        Get the x / horizontal index for a file, i.e. 0th corresponds to the first file in the board and so on.
-
-        This translates a tile to the appropriate screen coordinate.
-        """
-        return file + 1 if self.player_perspective == Side.WHITE else 7 - file + 1
-
-    def _y_index_for_rank(self, rank) -> int:
-        """
-        Get the y / vertical index for a rank, i.e. 0th corresponds to the first rank in the board and so on.
-
-        This translates a tile to the appropriate screen coordinate.
-        """
-        return rank + 1 if self.player_perspective == Side.WHITE else 7 - rank + 1
+    def draw_pieces(self, board: ChessBoard, animations: dict[int, MoveAnimation]) -> None:
+        if animations:
+            # Moving pieces have to be layered in between the pieces at rest, so draw every piece to the screen
+            self._blt_pieces(pyxel.blt, board, animations)
+            return
+
+        if self._pieces_layer_zobrist != board.zobrist:
+            self._pieces_layer.rect(0, 0, BOARD_WIDTH, BOARD_HEIGHT, 2)
+            self._blt_pieces(self._pieces_layer.blt, board, animations)
+            self._pieces_layer_zobrist = board.zobrist
+        pyxel.blt(0, 0, self._pieces_layer, 0, 0, BOARD_WIDTH, BOARD_HEIGHT, colkey=2)
+
+    def _blt_pieces(self, blt: Callable, board: ChessBoard, animations: dict[int, MoveAnimation]) -> None:
+        squares, file_x, rank_y = board.board, self._file_x, self._rank_y
+        for square in sorted(iter_squares(board.occupied), key=DRAW_ORDER.__getitem__):
+            piece = squares[square]
+            x, y = file_x[square & 7], rank_y[square >> 3]
+            if animations and (animation := animations.get(square)):
+                # Slide from the square the piece moved from, which the animation calls its dst
+                src_x, src_y = file_x[animation.dst.file], rank_y[animation.dst.rank]
+                x = src_x + (x - src_x) * animation.progress
+                y = src_y + (y - src_y) * animation.progress
+
+            blt(
+                x,
+                y,
+                0,
+                0 if piece.side is Side.WHITE else 1 * TILE_WIDTH,
+                piece.image_row * TILE_HEIGHT,
+                TILE_WIDTH,
+                TILE_HEIGHT,
+                colkey=2,
+            )
 
 
 class GameInfo(UIComponent):
     """"""
 
-    def __init__(self, ui_events: list[GameEvent]) -> None:
+    def __init__(self, ui_events: deque[GameEvent]) -> None:
         self.x = BOARD_WIDTH
         self.y = 0
         self.width = GAME_INFO_WIDTH
@@ -183,18 +197,11 @@ class PlayerTimers(UIComponent):
     def draw(self, turn: Turn) -> None:
         # White timer
         pyxel.rect(self.x, 0, self.width / 2, self.height, 15)
-        white_mins, white_secs = turn.get_mins_seconds_left(Side.WHITE)
-        pyxel.text(self.x + 5, 5, f"{int(white_mins):02d}:{int(white_secs):02d}", 0)
+        pyxel.text(self.x + 5, 5, turn.get_timer_text(Side.WHITE), 0)
 
         # Black timer
         pyxel.rect(self.x + (2 * TILE_WIDTH), 0, self.width, self.height, 4)
-        black_mins, black_secs = turn.get_mins_seconds_left(Side.BLACK)
-        pyxel.text(
-            BOARD_WIDTH + 5 + 2 * TILE_WIDTH,
-            5,
-            f"{int(black_mins):02d}:{int(black_secs):02d}",
-            0,
-        )
+        pyxel.text(BOARD_WIDTH + 5 + 2 * TILE_WIDTH, 5, turn.get_timer_text(Side.BLACK), 0)
 
 
 class MoveHistory(UIComponent):
@@ -210,17 +217,20 @@ class MoveHistory(UIComponent):
         ]
         self.move_history_window_size = int(8 - 1) * 2 + 1
         self.move_history_frame = 0
-        self.prev_move_history: list = []
+        self.prev_move_history_length = 0
+        # Numbered lines of the history being shown, extended as moves are made
+        self.move_history_lines: list[str] = []
+        self._lines_move_history: Optional[list[Move]] = None
 
     def _increment_move_history_frame(self, move_history: list) -> None:
         if self.move_history_frame < max(len(move_history) - self.move_history_window_size, 0):
             self.move_history_frame += 1
-            print(self.move_history_frame)
+            logger.debug("%s", self.move_history_frame)
 
     def _decrement_move_history_frame(self, move_history: list) -> None:
         if self.move_history_frame > 0:
             self.move_history_frame -= 1
-            print(self.move_history_frame)
+            logger.debug("%s", self.move_history_frame)
 
     def draw(self, move_history: list[Move]) -> None:
         move_history_height_tiles = (GAME_INFO_HEIGHT / TILE_HEIGHT) - 2
@@ -232,27 +242,26 @@ class MoveHistory(UIComponent):
             0,
         )
 
-        if len(self.prev_move_history) < len(move_history):
-            if self.move_history_frame == max(len(self.prev_move_history) - self.move_history_window_size, 0):
-                for _ in range(0, len(move_history) - self.move_history_window_size):
-                    self._increment_move_history_frame(move_history)
-
-        if len(move_history):
-            for draw_pos, move_index in enumerate(
-                range(
-                    self.move_history_frame,
-                    min(len(move_history), self.move_history_frame + self.move_history_window_size),
-                )
-            ):
-                label = f"{int(move_index / 2) + 1}. " if not move_index % 2 else "   "
-                pyxel.text(
-                    BOARD_WIDTH + 4,
-                    (TILE_HEIGHT * 1 + 6) + (draw_pos * (TILE_HEIGHT / 2)),
-                    f"{label}{move_history[move_index].long_algebraic_notation}",
-                    7,
-                )
-
-        self.prev_move_history = move_history
+        # Follow new moves as they are made, unless the history has been scrolled back
+        if self.prev_move_history_length < len(move_history):
+            if self.move_history_frame == max(self.prev_move_history_length - self.move_history_window_size, 0):
+                self.move_history_frame = max(len(move_history) - self.move_history_window_size, 0)
+
+        if move_history is not self._lines_move_history:
+            # A new game has started
+            self._lines_move_history = move_history
+            self.move_history_lines = []
+        for move_index in range(len(self.move_history_lines), len(move_history)):
+            label = f"{move_index // 2 + 1}. " if not move_index % 2 else "   "
+            self.move_history_lines.append(f"{label}{move_history[move_index].long_algebraic_notation}")
+
+        text = pyxel.text
+        for draw_pos, line in enumerate(
+            self.move_history_lines[self.move_history_frame : self.move_history_frame + self.move_history_window_size]
+        ):
+            text(BOARD_WIDTH + 4, (TILE_HEIGHT * 1 + 6) + (draw_pos * (TILE_HEIGHT / 2)), line, 7)
+
+        self.prev_move_history_length = len(move_history)
 
         for component in self.subcomponents:
             component.draw()
@@ -278,6 +287,9 @@ class ScrollUpButton(UIComponent, Clickable):
             colkey=2,
         )
 
+    def handle_click(self, game: Game) -> None:
+        self.on_click(game.move_history)
+
     def on_click(self, move_history) -> None:
         self.on_click(move_history)
 
@@ -302,12 +314,15 @@ class ScrollDownButton(UIComponent, Clickable):
             colkey=2,
         )
 
+    def handle_click(self, game: Game) -> None:
+        self.on_click(game.move_history)
+
     def on_click(self, move_history) -> None:
         self.on_click(move_history)
 
 
 class GameControls(UIComponent, Clickable):
-    def __init__(self, ui_events: list[GameEvent]) -> None:
+    def __init__(self, ui_events: deque[GameEvent]) -> None:
         self.x = BOARD_WIDTH
         self.y = TILE_HEIGHT * 9
         self.width = GAME_INFO_WIDTH
@@ -318,10 +333,10 @@ class GameControls(UIComponent, Clickable):
             Button(BOARD_WIDTH + 2 * TILE_WIDTH, self.y, 0, 80, lambda: self.publish_draw_offer(ui_events)),
         ]
 
-    def publish_draw_offer(self, ui_events: list[GameEvent]) -> None:
+    def publish_draw_offer(self, ui_events: deque[GameEvent]) -> None:
         ui_events.append(GameEvent.OFFER_DRAW)
 
-    def publish_resign(self, ui_events: list[GameEvent]) -> None:
+    def publish_resign(self, ui_events: deque[GameEvent]) -> None:
         ui_events.append(GameEvent.RESIGN)
 
     def draw(self) -> None:
@@ -351,12 +366,15 @@ class Button(UIComponent, Clickable):
     def draw(self) -> None:
         pyxel.blt(self.x, self.y, 1, self.u, self.v, self.width, self.height, colkey=2)
 
+    def handle_click(self, game: Game) -> None:
+        self.on_click()
+
     def on_click(self) -> None:
         self.on_click()
 
 
 class GameOutcomeModal(UIComponent):
-    def __init__(self, ui_events: list[GameEvent]) -> None:
+    def __init__(self, ui_events: deque[GameEvent]) -> None:
         self.x = TILE_WIDTH * 2
         self.y = TILE_HEIGHT * 2
         self.width = BOARD_WIDTH - (TILE_WIDTH * 4)
@@ -374,7 +392,7 @@ class GameOutcomeModal(UIComponent):
         ]
         self.hidden = True
 
-    def publish_restart_game(self, ui_events: list[GameEvent]) -> None:
+    def publish_restart_game(self, ui_events: deque[GameEvent]) -> None:
         ui_events.append(GameEvent.RESTART_GAME)
 
     def draw(self, game: Game) -> None:
@@ -382,7 +400,7 @@ class GameOutcomeModal(UIComponent):
             return
         assert game.outcome
 
-        if game.outcome.winner == Side.WHITE:
+        if game.outcome.winner is Side.WHITE:
             self.background_colour = 0
             self.text_colour = 15
         else:
@@ -0,0 +1,47 @@
+import unittest
+
+from chess import ChessBoard, InvalidMove
+from pieces import King, Pawn, Position, Queen, Rook, Side
+
+
+class SearchTest(unittest.TestCase):
+    def test_finds_mate_in_one(self):
+        board = ChessBoard(
+            [
+                King(Position.of(7, 6), Side.WHITE),
+                Rook(Position.of(7, 0), Side.WHITE),
+                King(Position.of(0, 7), Side.BLACK),
+                Pawn(Position.of(1, 6), Side.BLACK),
+                Pawn(Position.of(1, 7), Side.BLACK),
+            ]
+        )
+        self.assertEqual(board.search(Side.WHITE, 2), (Position.of(7, 0), Position.of(0, 0)))
+
+    def test_returns_legal_move_and_leaves_board_unchanged(self):
+        board = ChessBoard()
+        zobrist = board.zobrist
+        src, dst = board.search(Side.WHITE, 3)
+        self.assertEqual(board.zobrist, zobrist)
+        try:
+            board.move(src, dst, Side.WHITE)
+        except InvalidMove as e:
+            self.fail(f"search returned an illegal move {src} -> {dst}: {e}")
+
+    def test_returns_none_without_legal_moves(self):
+        # Stalemate, the black king on a8 has nowhere to go
+        board = ChessBoard(
+            [
+                King(Position.of(7, 7), Side.WHITE),
+                Queen(Position.of(2, 1), Side.WHITE),
+                King(Position.of(0, 0), Side.BLACK),
+            ]
+        )
+        self.assertIsNone(board.search(Side.BLACK, 1))
+
+    def test_rejects_depth_below_one(self):
+        with self.assertRaises(ValueError):
+            ChessBoard().search(Side.WHITE, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()